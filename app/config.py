@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import List
 
 class Settings:
@@ -23,8 +24,42 @@ class Settings:
     
     # Video Download Settings
     MAX_VIDEO_SIZE_MB = int(os.getenv("MAX_VIDEO_SIZE_MB", "500"))
-    DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "30"))
-    
+    DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "30"))  # connect / idle-read seconds
+    STREAM_MAX_DURATION = int(os.getenv("STREAM_MAX_DURATION", "600"))  # upstream seconds per /stream, excluding throttling
+    STREAM_CLIENT_BANDWIDTH_KBPS = int(os.getenv("STREAM_CLIENT_BANDWIDTH_KBPS", "4096"))  # 0 = unlimited
+    STREAM_GLOBAL_BANDWIDTH_KBPS = int(os.getenv("STREAM_GLOBAL_BANDWIDTH_KBPS", "32768"))  # 0 = unlimited
+    STREAM_MAX_CONNECTIONS = int(os.getenv("STREAM_MAX_CONNECTIONS", "100"))  # concurrent /stream upstreams
+
+    # Upstream Protection (Facebook extraction)
+    EXTRACT_MIN_CONCURRENCY = int(os.getenv("EXTRACT_MIN_CONCURRENCY", "1"))
+    EXTRACT_MAX_CONCURRENCY = int(os.getenv("EXTRACT_MAX_CONCURRENCY", "16"))
+    EXTRACT_INITIAL_CONCURRENCY = int(os.getenv("EXTRACT_INITIAL_CONCURRENCY", "4"))
+    EXTRACT_TARGET_LATENCY = float(os.getenv("EXTRACT_TARGET_LATENCY", "10"))  # seconds
+    EXTRACT_MAX_ATTEMPTS = int(os.getenv("EXTRACT_MAX_ATTEMPTS", "3"))
+    EXTRACT_BACKOFF_BASE = float(os.getenv("EXTRACT_BACKOFF_BASE", "0.5"))  # seconds
+    EXTRACT_BACKOFF_MAX = float(os.getenv("EXTRACT_BACKOFF_MAX", "8"))  # seconds
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_TIMEOUT = int(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))  # seconds
+    NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", "600"))  # seconds
+    # Facebook CDN links are signed and expire, so keep this well under a few hours
+    EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", "1800"))  # seconds
+
+    # Thumbnail Proxy
+    THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "fbdl-thumbnails"))
+    THUMBNAIL_MEMORY_CACHE_MB = int(os.getenv("THUMBNAIL_MEMORY_CACHE_MB", "32"))
+    THUMBNAIL_DISK_CACHE_MB = int(os.getenv("THUMBNAIL_DISK_CACHE_MB", "256"))
+    THUMBNAIL_MAX_SOURCE_MB = int(os.getenv("THUMBNAIL_MAX_SOURCE_MB", "5"))
+    THUMBNAIL_RATE_LIMIT_REQUESTS = int(os.getenv("THUMBNAIL_RATE_LIMIT_REQUESTS", "60"))  # per RATE_LIMIT_WINDOW
+
+    # Prefetch / Pre-warming
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # admin endpoints are disabled when empty
+    PREFETCH_RATE_PER_MINUTE = int(os.getenv("PREFETCH_RATE_PER_MINUTE", "10"))
+    PREFETCH_MAX_QUEUE = int(os.getenv("PREFETCH_MAX_QUEUE", "1000"))
+    PREFETCH_THUMBNAILS = os.getenv("PREFETCH_THUMBNAILS", "False").lower() == "true"
+
+    # Graceful Shutdown
+    SHUTDOWN_DRAIN_TIMEOUT = int(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "25"))  # seconds
+
     # Environment
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
     HOST = os.getenv("HOST", "0.0.0.0")
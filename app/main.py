@@ -1,9 +1,11 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
 import logging
 import sys
+import time
 from contextlib import asynccontextmanager
 import aiohttp
 import tempfile
@@ -27,10 +29,19 @@ from app.models import (
     VideoDownloadRequest, 
     VideoDownloadResponse, 
     ErrorResponse,
-    VideoQuality
+    VideoQuality,
+    PrefetchRequest,
+    PrefetchResponse
 )
-from app.services.video_service import video_service
-from app.utils.rate_limiter import check_rate_limit
+from app.services.video_service import video_service, UpstreamUnavailableError
+from app.services.thumbnail_service import thumbnail_service, THUMBNAIL_SIZES, THUMBNAIL_FORMATS
+from app.services.prefetch_service import prefetch_service
+from app.utils.admin_auth import check_admin_token
+from app.utils.http_client import http_client, stream_http_client
+from app.utils.bandwidth import bandwidth_limiter
+from app.utils.lifecycle import drain_controller, check_not_draining
+from app.utils.rate_limiter import check_rate_limit, check_thumbnail_rate_limit, rate_limiter
+from app.utils.validators import URLValidator
 
 # Configure logging
 logging.basicConfig(
@@ -52,6 +63,11 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     logger.info("📱 Facebook Video Downloader API shutting down...")
+    # Reuses the SIGTERM drain when there was one, so it is reported once
+    await drain_controller.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await prefetch_service.stop()
+    await http_client.close()
+    await stream_http_client.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -63,6 +79,9 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Must run before uvicorn installs its signal handlers, i.e. at import
+drain_controller.install_server_hook()
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -99,15 +118,46 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
+    """Health check endpoint (503 while draining so load balancers stop routing here)"""
+    content = {
+        "status": "draining" if drain_controller.draining else "healthy",
         "version": settings.API_VERSION,
-        "service": "Facebook Video Downloader API"
+        "service": "Facebook Video Downloader API",
+        "lifecycle": drain_controller.stats(),
+        "upstream": video_service.upstream_status()
     }
+    return JSONResponse(status_code=503 if drain_controller.draining else 200, content=content)
+
+def upstream_unavailable(e: UpstreamUnavailableError) -> HTTPException:
+    """Map an open circuit breaker to a 503 with Retry-After"""
+    logger.warning(f"Upstream unavailable: {str(e)}")
+    return HTTPException(
+        status_code=503,
+        detail={
+            "status": "error",
+            "message": str(e),
+            "error_code": "UPSTREAM_UNAVAILABLE"
+        },
+        headers={"Retry-After": str(max(1, int(e.retry_after)))}
+    )
+
+class StreamAborted(Exception):
+    """A /stream transfer cut short by a size, duration or shutdown limit"""
+
+def streams_busy() -> HTTPException:
+    """503 for when every /stream upstream connection is in use"""
+    return HTTPException(
+        status_code=503,
+        detail={
+            "status": "error",
+            "message": "Too many downloads in progress. Please retry shortly.",
+            "error_code": "STREAMS_BUSY"
+        },
+        headers={"Retry-After": "5"}
+    )
 
 # Main video download endpoint
-@app.post("/download", response_model=VideoDownloadResponse)
+@app.post("/download", response_model=VideoDownloadResponse, dependencies=[Depends(check_not_draining)])
 async def download_video(
     request: VideoDownloadRequest,
     _: None = Depends(check_rate_limit)
@@ -140,6 +190,8 @@ async def download_video(
         logger.info(f"Successfully processed video: {result['video_info'].title}")
         return response
         
+    except UpstreamUnavailableError as e:
+        raise upstream_unavailable(e)
     except ValueError as e:
         logger.warning(f"Invalid request: {str(e)}")
         raise HTTPException(
@@ -162,57 +214,206 @@ async def download_video(
         )
 
 # Streaming download endpoint  
-@app.get("/stream/{video_id}")
-async def stream_video(video_id: str, url: str):
+@app.get("/stream/{video_id}", dependencies=[Depends(check_not_draining)])
+async def stream_video(video_id: str, url: str, request: Request):
     """
     Stream video file directly through our server to avoid CORS issues
+    
+    Transfers are capped at MAX_VIDEO_SIZE_MB and throttled by the
+    per-client and global bandwidth budgets. STREAM_MAX_DURATION counts
+    only time spent waiting on upstream, not time held back by throttling.
     """
+    logger.info(f"Streaming video: {url}")
+    
+    # Validate URL
+    parsed_url = urlparse(url)
+    if not parsed_url.scheme or not parsed_url.netloc:
+        raise HTTPException(status_code=400, detail="Invalid URL")
+    
+    max_bytes = settings.MAX_VIDEO_SIZE_MB * 1024 * 1024
+    client_id = rate_limiter.get_client_id(request)
+    
+    # Fail fast instead of queueing behind long transfers for a pooled connection
+    if not stream_http_client.try_reserve():
+        raise streams_busy()
+    
+    upstream = None
+    released = False
+    
+    def release_upstream():
+        nonlocal released
+        if not released:
+            released = True
+            if upstream is not None:
+                upstream.release()
+            stream_http_client.unreserve()
+    
     try:
-        logger.info(f"Streaming video: {url}")
-        
-        # Validate URL
-        parsed_url = urlparse(url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            raise HTTPException(status_code=400, detail="Invalid URL")
-        
-        async def generate():
-            timeout = aiohttp.ClientTimeout(total=600)  # 10 minutes timeout
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                try:
-                    async with session.get(
-                        url, 
-                        headers={
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }
-                    ) as response:
-                        if response.status != 200:
-                            raise HTTPException(status_code=response.status, detail="Failed to fetch video")
-                        
-                        chunk_size = 8192
-                        async for chunk in response.content.iter_chunked(chunk_size):
-                            yield chunk
-                            
-                except Exception as e:
+        # No aiohttp total: it would also count throttling sleeps. The idle
+        # read timer is suspended while reading is paused for back-pressure.
+        # `connect` also bounds any wait for a free pool connection.
+        timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=settings.DOWNLOAD_TIMEOUT,
+            sock_connect=settings.DOWNLOAD_TIMEOUT,
+            sock_read=settings.DOWNLOAD_TIMEOUT
+        )
+        upstream = await stream_http_client.get_session().get(url, timeout=timeout)
+    except Exception as e:
+        release_upstream()
+        logger.error(f"Stream error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to stream video")
+    except BaseException:
+        # Cancelled while connecting (client went away) - don't leak the slot
+        release_upstream()
+        raise
+    
+    # Reject before sending any body when the size is known up front
+    if upstream.status != 200:
+        release_upstream()
+        raise HTTPException(status_code=502, detail="Failed to fetch video")
+    
+    if upstream.content_length is not None and upstream.content_length > max_bytes:
+        release_upstream()
+        logger.warning(f"Rejected stream of {upstream.content_length} bytes for {video_id}")
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "status": "error",
+                "message": f"Video exceeds the {settings.MAX_VIDEO_SIZE_MB} MB limit",
+                "error_code": "VIDEO_TOO_LARGE"
+            }
+        )
+    
+    def abort(reason: str):
+        logger.warning(f"Aborting stream for {video_id}: {reason}")
+        # Raising drops the connection; returning would end a chunked
+        # response cleanly and a cut transfer would look complete
+        raise StreamAborted(reason)
+    
+    async def generate():
+        bytes_sent = 0
+        started = time.monotonic()
+        throttled = 0.0
+        with drain_controller.track_stream(upstream.close) as stream:
+            try:
+                chunk_size = 65536
+                async for chunk in upstream.content.iter_chunked(chunk_size):
+                    if stream.aborted:
+                        stream.cut = True
+                        abort("shutdown drain deadline reached")
+                    # Content-Length can be missing or wrong - count what actually flows
+                    if bytes_sent + len(chunk) > max_bytes:
+                        abort(f"exceeded {settings.MAX_VIDEO_SIZE_MB} MB limit")
+                    if time.monotonic() - started - throttled > settings.STREAM_MAX_DURATION:
+                        abort(f"upstream exceeded {settings.STREAM_MAX_DURATION}s")
+                    throttled += await bandwidth_limiter.consume(client_id, len(chunk))
+                    bytes_sent += len(chunk)
+                    yield chunk
+                    
+            except StreamAborted:
+                raise
+            except Exception as e:
+                # Closing upstream at the drain deadline surfaces here as a read error
+                if not stream.aborted:
                     logger.error(f"Streaming error: {str(e)}")
                     raise
-        
-        return StreamingResponse(
-            generate(),
-            media_type="video/mp4",
-            headers={
-                "Content-Disposition": f"attachment; filename=\"{video_id}.mp4\"",
-                "Content-Type": "video/mp4",
-                "Cache-Control": "no-cache",
-                "Access-Control-Expose-Headers": "Content-Disposition"
+                stream.cut = True
+                abort("shutdown drain deadline reached")
+            finally:
+                release_upstream()
+                logger.info(f"Streamed {bytes_sent} bytes for {video_id}")
+    
+    headers = {
+        "Content-Disposition": f"attachment; filename=\"{video_id}.mp4\"",
+        "Content-Type": "video/mp4",
+        "Cache-Control": "no-cache",
+        "Access-Control-Expose-Headers": "Content-Disposition"
+    }
+    if upstream.content_length is not None:
+        headers["Content-Length"] = str(upstream.content_length)
+    
+    async def release_on_loop():
+        # Async so Starlette runs it on the loop - aiohttp is not thread-safe
+        release_upstream()
+    
+    return StreamingResponse(
+        generate(),
+        media_type="video/mp4",
+        headers=headers,
+        # Covers clients that disconnect before the body starts
+        background=BackgroundTask(release_on_loop)
+    )
+
+# Resized, cached thumbnail proxy
+@app.get("/thumbnail/{video_id}", dependencies=[Depends(check_not_draining)])
+async def get_thumbnail(
+    video_id: str,
+    url: str,
+    request: Request,
+    size: str = "medium",
+    _: None = Depends(check_thumbnail_rate_limit)
+):
+    """
+    Serve a resized copy of a Facebook thumbnail from the local cache
+    
+    - **url**: Original thumbnail URL from `video_info.thumbnail` (required)
+    - **size**: One of small, medium, large (optional, default: medium)
+    
+    WebP is returned when the client accepts it, JPEG otherwise.
+    """
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "error",
+                "message": f"Size must be one of: {', '.join(THUMBNAIL_SIZES)}",
+                "error_code": "INVALID_REQUEST"
             }
         )
-        
+    
+    if not URLValidator.is_facebook_media_url(url):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "status": "error",
+                "message": "Thumbnail URL must point to a Facebook CDN host (fbcdn.net, fbsbx.com)",
+                "error_code": "INVALID_REQUEST"
+            }
+        )
+    
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    etag = f'"{thumbnail_service.variant_name(thumbnail_service.source_key(url), size, fmt)}"'
+    cache_headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": etag,
+        "Vary": "Accept"
+    }
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+    
+    try:
+        data, _ = await thumbnail_service.get_thumbnail(url, size, fmt)
     except Exception as e:
-        logger.error(f"Stream error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to stream video")
+        logger.warning(f"Thumbnail error for {video_id}: {str(e)}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                "status": "error",
+                "message": "Failed to fetch thumbnail",
+                "error_code": "THUMBNAIL_UNAVAILABLE"
+            }
+        )
+    
+    return Response(
+        content=data,
+        media_type=THUMBNAIL_FORMATS[fmt][1],
+        headers=cache_headers
+    )
 
 # Get video info without download
-@app.post("/info", response_model=VideoDownloadResponse)
+@app.post("/info", response_model=VideoDownloadResponse, dependencies=[Depends(check_not_draining)])
 async def get_video_info(
     request: VideoDownloadRequest,
     _: None = Depends(check_rate_limit)
@@ -242,6 +443,8 @@ async def get_video_info(
         logger.info(f"Successfully retrieved info: {result['video_info'].title}")
         return response
         
+    except UpstreamUnavailableError as e:
+        raise upstream_unavailable(e)
     except ValueError as e:
         logger.warning(f"Invalid request: {str(e)}")
         raise HTTPException(
@@ -269,6 +472,29 @@ async def get_supported_qualities():
         }
     }
 
+# Admin: warm caches for videos expected to trend
+@app.post("/admin/prefetch", response_model=PrefetchResponse, status_code=202, dependencies=[Depends(check_not_draining)])
+async def prefetch_videos(
+    request: PrefetchRequest,
+    _: None = Depends(check_admin_token)
+):
+    """
+    Queue Facebook video URLs for low-priority background extraction
+    
+    - **urls**: Facebook video URLs (required)
+    - **quality**: Quality to warm the cache for (optional, default: best)
+    
+    Requires the `X-Admin-Token` header. Prefetching is rate capped and
+    only runs while the extraction limiter has spare capacity.
+    """
+    result = prefetch_service.enqueue(request.urls, request.quality)
+    return PrefetchResponse(status="accepted", **result, **prefetch_service.stats())
+
+@app.get("/admin/prefetch", response_model=PrefetchResponse)
+async def prefetch_status(_: None = Depends(check_admin_token)):
+    """Get background prefetch progress"""
+    return PrefetchResponse(status="success", **prefetch_service.stats())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -65,6 +65,29 @@ class VideoDownloadResponse(BaseModel):
             }
         }
 
+class PrefetchRequest(BaseModel):
+    urls: List[str]
+    quality: Optional[VideoQuality] = VideoQuality.BEST
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "urls": [
+                    "https://www.facebook.com/watch/?v=1234567890",
+                    "https://fb.watch/abc123/"
+                ],
+                "quality": "720p"
+            }
+        }
+
+class PrefetchResponse(BaseModel):
+    status: str
+    queued: int = 0
+    rejected: List[str] = []
+    pending: int = 0
+    completed: int = 0
+    failed: int = 0
+
 class ErrorResponse(BaseModel):
     status: str = "error"
     message: str
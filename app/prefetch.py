@@ -0,0 +1,84 @@
+"""
+Queue known-popular videos for cache warming on a running server.
+
+Usage:
+    ADMIN_TOKEN=... python -m app.prefetch urls.txt [--server URL] [--quality 720p]
+    cat urls.txt | python -m app.prefetch -
+
+URLs are checked locally with URLValidator and submitted to the server's
+/admin/prefetch endpoint, which extracts them in the background at low
+priority. The caches live in the server process, so it must be running.
+"""
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+from typing import List
+
+from app.config import settings
+from app.models import VideoQuality
+from app.utils.validators import URLValidator
+
+BATCH_SIZE = 500
+
+def read_urls(sources: List[str]) -> List[str]:
+    """Read one URL per line from files ('-' for stdin), skipping blanks and # comments"""
+    urls = []
+    for source in sources:
+        handle = sys.stdin if source == "-" else open(source)
+        with handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+    return urls
+
+def submit(server: str, token: str, urls: List[str], quality: str) -> dict:
+    request = urllib.request.Request(
+        f"{server.rstrip('/')}/admin/prefetch",
+        data=json.dumps({"urls": urls, "quality": quality}).encode(),
+        headers={"Content-Type": "application/json", "X-Admin-Token": token},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=settings.DOWNLOAD_TIMEOUT) as response:
+        return json.loads(response.read())
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-warm caches for known-popular Facebook videos")
+    parser.add_argument("sources", nargs="+", help="Files with one URL per line, or - for stdin")
+    parser.add_argument("--server", default=f"http://localhost:{settings.PORT}", help="Base URL of the running API")
+    parser.add_argument("--token", default=settings.ADMIN_TOKEN, help="Admin token (default: $ADMIN_TOKEN)")
+    parser.add_argument("--quality", default=VideoQuality.BEST.value, choices=[q.value for q in VideoQuality])
+    args = parser.parse_args(argv)
+
+    if not args.token:
+        parser.error("an admin token is required (--token or ADMIN_TOKEN)")
+
+    urls = read_urls(args.sources)
+    valid = []
+    for url in urls:
+        if URLValidator.is_valid_facebook_url(url):
+            valid.append(url)
+        else:
+            print(f"Skipping invalid URL: {url}", file=sys.stderr)
+
+    queued = 0
+    try:
+        for start in range(0, len(valid), BATCH_SIZE):
+            result = submit(args.server, args.token, valid[start:start + BATCH_SIZE], args.quality)
+            queued += result.get("queued", 0)
+            for url in result.get("rejected", []):
+                print(f"Rejected by server: {url}", file=sys.stderr)
+    except urllib.error.HTTPError as e:
+        print(f"Prefetch request failed: HTTP {e.code} {e.read().decode(errors='replace')}", file=sys.stderr)
+        return 1
+    except urllib.error.URLError as e:
+        print(f"Could not reach {args.server}: {e.reason}", file=sys.stderr)
+        return 1
+
+    print(f"Queued {queued} of {len(urls)} URLs for prefetch")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config import settings
+from app.models import VideoQuality
+from app.services.thumbnail_service import thumbnail_service
+from app.services.video_service import video_service, UpstreamUnavailableError
+from app.utils.lifecycle import drain_controller
+from app.utils.validators import URLValidator
+
+logger = logging.getLogger(__name__)
+
+class PrefetchService:
+    """Low-priority background warming of the extraction (and thumbnail) caches"""
+
+    # How long to back off when live traffic or an open circuit needs the upstream
+    IDLE_POLL_INTERVAL = 1.0
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._pending: Set[Tuple[str, VideoQuality]] = set()
+        self.completed = 0
+        self.failed = 0
+
+    def enqueue(self, urls: List[str], quality: VideoQuality = VideoQuality.BEST) -> Dict[str, Any]:
+        """Validate and queue URLs, returning how many were accepted"""
+        queue = self._ensure_worker()
+        queued = 0
+        rejected = []
+
+        for url in urls:
+            if not URLValidator.is_valid_facebook_url(url):
+                rejected.append(url)
+                continue
+
+            key = (URLValidator.normalize_url(url), quality)
+            if key in self._pending:
+                continue
+            if queue.full():
+                rejected.append(url)
+                continue
+
+            self._pending.add(key)
+            queue.put_nowait(key)
+            queued += 1
+
+        logger.info(f"Prefetch queued {queued} URLs ({len(rejected)} rejected)")
+        return {"queued": queued, "rejected": rejected}
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=settings.PREFETCH_MAX_QUEUE)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run_worker())
+        return self._queue
+
+    async def _run_worker(self):
+        # A single worker with a fixed interval caps the prefetch rate
+        interval = 60.0 / max(1, settings.PREFETCH_RATE_PER_MINUTE)
+
+        while True:
+            key = await self._queue.get()
+            requeue = False
+            try:
+                await self._wait_for_idle_upstream()
+                await self._prefetch(*key)
+            except UpstreamUnavailableError as e:
+                # Circuit is not closed - wait it out, then retry this URL later
+                logger.warning(f"Prefetch paused, upstream unavailable: {key[0]}")
+                await asyncio.sleep(max(self.IDLE_POLL_INTERVAL, e.retry_after))
+                requeue = True
+            finally:
+                self._queue.task_done()
+                if requeue and not self._queue.full():
+                    self._queue.put_nowait(key)
+                else:
+                    self._pending.discard(key)
+            await asyncio.sleep(interval)
+
+    async def _wait_for_idle_upstream(self):
+        """Yield to live requests: only run when the limiter has headroom"""
+        while not video_service.limiter.has_spare_capacity() or drain_controller.draining:
+            await asyncio.sleep(self.IDLE_POLL_INTERVAL)
+
+    async def _prefetch(self, url: str, quality: VideoQuality):
+        try:
+            # One attempt that never touches the breakers - live traffic owns those
+            result = await video_service.get_video_info(url, quality, record_upstream=False, max_attempts=1)
+            thumbnail = result['video_info'].thumbnail
+            if settings.PREFETCH_THUMBNAILS and thumbnail and URLValidator.is_facebook_media_url(thumbnail):
+                # Renders and caches every size/format variant in one fetch
+                await thumbnail_service.get_thumbnail(thumbnail, "medium", "webp")
+            self.completed += 1
+            logger.info(f"Prefetched video: {url}")
+        except UpstreamUnavailableError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"Prefetch failed for {url}: {str(e)}")
+
+    async def stop(self):
+        """Cancel the background worker (called on shutdown)"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+# Global service instance
+prefetch_service = PrefetchService()
@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import aiohttp
+from PIL import Image
+
+from app.config import settings
+from app.utils.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+# Fixed output widths - height follows the source aspect ratio
+THUMBNAIL_SIZES = {
+    "small": 160,
+    "medium": 320,
+    "large": 640
+}
+
+# format name -> (Pillow encoder, media type, extension)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg")
+}
+
+# fbcdn signature (oh/oe) and tracking (_nc_*) params change on every
+# extraction; everything else (e.g. stp, the server-side size/crop) is kept
+VOLATILE_QUERY_PARAMS = ("oh", "oe")
+VOLATILE_QUERY_PREFIX = "_nc_"
+
+class ThumbnailCache:
+    """Two-tier LRU cache (memory + disk) for rendered thumbnail variants"""
+
+    def __init__(self, directory: str, memory_limit: int, disk_limit: int):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_bytes = 0
+        self.disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        self._disk_loaded = False
+        # Cache is touched from executor threads
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        """Return cached bytes, promoting disk hits into memory"""
+        with self._lock:
+            data = self.memory.get(name)
+            if data is not None:
+                self.memory.move_to_end(name)
+                return data
+
+            self._load_disk_index()
+            if name not in self.disk:
+                return None
+
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                self.disk_bytes -= self.disk.pop(name)
+                return None
+
+            self.disk.move_to_end(name)
+            self._put_memory(name, data)
+            return data
+
+    def put(self, name: str, data: bytes):
+        """Store bytes in memory and on disk, evicting least recently used entries"""
+        with self._lock:
+            self._put_memory(name, data)
+            self._load_disk_index()
+
+            path = os.path.join(self.directory, name)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write thumbnail to disk cache: {str(e)}")
+                return
+
+            self.disk_bytes -= self.disk.pop(name, 0)
+            self.disk[name] = len(data)
+            self.disk_bytes += len(data)
+
+            while self.disk_bytes > self.disk_limit and len(self.disk) > 1:
+                old_name, size = self.disk.popitem(last=False)
+                self.disk_bytes -= size
+                try:
+                    os.remove(os.path.join(self.directory, old_name))
+                except OSError:
+                    pass
+
+    def _put_memory(self, name: str, data: bytes):
+        self.memory_bytes -= len(self.memory.pop(name, b""))
+        self.memory[name] = data
+        self.memory_bytes += len(data)
+
+        while self.memory_bytes > self.memory_limit and len(self.memory) > 1:
+            _, old = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old)
+
+    def _load_disk_index(self):
+        """Rebuild the disk LRU order from file mtimes (once per process)"""
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self.disk[name] = size
+            self.disk_bytes += size
+
+class ThumbnailService:
+    """Fetches Facebook thumbnails once and serves resized cached variants"""
+
+    def __init__(self):
+        self.cache = ThumbnailCache(
+            settings.THUMBNAIL_CACHE_DIR,
+            memory_limit=settings.THUMBNAIL_MEMORY_CACHE_MB * 1024 * 1024,
+            disk_limit=settings.THUMBNAIL_DISK_CACHE_MB * 1024 * 1024
+        )
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def source_key(url: str) -> str:
+        """Stable cache key for a source image URL
+
+        fbcdn URLs are re-signed on every extraction, so the signature and
+        tracking params are dropped; params that pick the rendition stay.
+        """
+        parsed = urlparse(url)
+        query = sorted(
+            (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if name not in VOLATILE_QUERY_PARAMS and not name.startswith(VOLATILE_QUERY_PREFIX)
+        )
+        stable = f"{parsed.path}?{urlencode(query)}"
+        return hashlib.sha256(stable.encode()).hexdigest()[:32]
+
+    @staticmethod
+    def variant_name(source_key: str, size: str, fmt: str) -> str:
+        return f"{source_key}_{size}.{THUMBNAIL_FORMATS[fmt][2]}"
+
+    async def get_thumbnail(self, url: str, size: str, fmt: str) -> Tuple[bytes, str]:
+        """Return (image bytes, variant name) for a thumbnail URL"""
+        if size not in THUMBNAIL_SIZES:
+            raise ValueError(f"Unsupported thumbnail size: {size}")
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format: {fmt}")
+
+        key = self.source_key(url)
+        name = self.variant_name(key, size, fmt)
+
+        loop = asyncio.get_event_loop()
+        data = await loop.run_in_executor(None, self.cache.get, name)
+        if data is not None:
+            return data, name
+
+        # Concurrent misses for the same image share one upstream fetch
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render_variants(url, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        variants = await asyncio.shield(task)
+        return variants[name], name
+
+    async def _render_variants(self, url: str, key: str) -> Dict[str, bytes]:
+        original = await self._fetch(url)
+
+        loop = asyncio.get_event_loop()
+        variants = await loop.run_in_executor(None, self._resize_all, original, key)
+        for name, data in variants.items():
+            await loop.run_in_executor(None, self.cache.put, name, data)
+
+        logger.info(f"Cached {len(variants)} thumbnail variants for {key}")
+        return variants
+
+    async def _fetch(self, url: str) -> bytes:
+        """Download the source image, refusing anything over the size cap"""
+        max_bytes = settings.THUMBNAIL_MAX_SOURCE_MB * 1024 * 1024
+        timeout = aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT)
+
+        session = http_client.get_session()
+        async with session.get(url, timeout=timeout) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Thumbnail fetch failed with status {response.status}")
+            if response.content_length and response.content_length > max_bytes:
+                raise RuntimeError("Thumbnail source image is too large")
+
+            buffer = bytearray()
+            async for chunk in response.content.iter_chunked(65536):
+                buffer.extend(chunk)
+                if len(buffer) > max_bytes:
+                    raise RuntimeError("Thumbnail source image is too large")
+            return bytes(buffer)
+
+    def _resize_all(self, original: bytes, key: str) -> Dict[str, bytes]:
+        """Render every fixed size in every output format (runs in thread)"""
+        with Image.open(io.BytesIO(original)) as source:
+            image = source.convert("RGB")
+
+        variants = {}
+        for size, width in THUMBNAIL_SIZES.items():
+            resized = image.copy()
+            # Bound by width only; thumbnail() never upscales
+            resized.thumbnail((width, width * 4), Image.LANCZOS)
+
+            for fmt, (encoder, _, _) in THUMBNAIL_FORMATS.items():
+                output = io.BytesIO()
+                if encoder == "JPEG":
+                    resized.save(output, encoder, quality=82, optimize=True, progressive=True)
+                else:
+                    resized.save(output, encoder, quality=80, method=4)
+                variants[self.variant_name(key, size, fmt)] = output.getvalue()
+
+        return variants
+
+# Global service instance
+thumbnail_service = ThumbnailService()
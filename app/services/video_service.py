@@ -1,25 +1,92 @@
 import yt_dlp
 import asyncio
 import logging
+import re
+import time
 from typing import Dict, List, Optional, Any
 from app.models import VideoInfo, VideoFormat, VideoQuality
 from app.utils.validators import URLValidator
+from app.utils.lifecycle import drain_controller
+from app.utils.upstream_guard import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    TTLCache,
+    backoff_delay
+)
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Error classes recognized by _extract_info
+ERROR_REDIRECT = "redirect"
+ERROR_PRIVATE = "private"
+ERROR_AGE_RESTRICTED = "age_restricted"
+ERROR_UNSUPPORTED = "unsupported"
+ERROR_FORMAT_UNAVAILABLE = "format_unavailable"
+ERROR_OTHER = "other"
+ERROR_THROTTLED = "throttled"
+
+# Signals that Facebook is throttling or failing - these are retried and trip
+# the breakers.
+UPSTREAM_ERRORS = (ERROR_THROTTLED,)
+
+# Definite answers about the URL itself, whatever the quality - only these are
+# negatively cached. Format, redirect and unrecognized errors are not.
+URL_ERRORS = (ERROR_PRIVATE, ERROR_AGE_RESTRICTED, ERROR_UNSUPPORTED)
+
+# HTTP 429/5xx, timeouts and dropped connections as reported by yt-dlp / urllib
+THROTTLING_PATTERN = re.compile(
+    r"HTTP Error (429|5\d\d)|too many requests|timed? ?out|connection (reset|aborted|refused)"
+    r"|remote end closed|temporarily unavailable|temporary failure|network is unreachable",
+    re.IGNORECASE
+)
+
+# A bare "age" would also match "webpage" in transient download errors
+AGE_RESTRICTED_PATTERN = re.compile(r"age[- ]restrict|confirm your age", re.IGNORECASE)
+
+class ExtractionError(ValueError):
+    """Video extraction failure tagged with its error class"""
+    
+    def __init__(self, message: str, kind: str = ERROR_OTHER):
+        super().__init__(message)
+        self.kind = kind
+
+class UpstreamUnavailableError(Exception):
+    """Raised when the circuit breaker is rejecting calls to Facebook"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class VideoDownloadService:
     """Service for downloading Facebook videos using yt-dlp"""
     
     def __init__(self):
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=settings.EXTRACT_INITIAL_CONCURRENCY,
+            min_limit=settings.EXTRACT_MIN_CONCURRENCY,
+            max_limit=settings.EXTRACT_MAX_CONCURRENCY,
+            target_latency=settings.EXTRACT_TARGET_LATENCY
+        )
+        self.breakers = {
+            kind: CircuitBreaker(
+                kind,
+                failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.CIRCUIT_RESET_TIMEOUT
+            )
+            for kind in UPSTREAM_ERRORS
+        }
+        self.negative_cache = TTLCache(ttl=settings.NEGATIVE_CACHE_TTL)
+        self.extraction_cache = TTLCache(ttl=settings.EXTRACTION_CACHE_TTL)
         self.ydl_opts = {
             'quiet': True,
             'no_warnings': False,
             'extractaudio': False,
             'audioformat': 'mp3',
             'outtmpl': '/tmp/%(title)s.%(ext)s',
-            'retries': 5,  # Increased retries for redirect issues
-            'fragment_retries': 5,
+            # Keep yt-dlp's own retries low - get_video_info retries with jittered backoff
+            'retries': 1,
+            'fragment_retries': 1,
             'ignoreerrors': False,
             'no_check_certificate': True,
             # Handle redirects and cookies better
@@ -36,8 +103,19 @@ class VideoDownloadService:
             }],
         }
     
-    async def get_video_info(self, url: str, quality: VideoQuality = VideoQuality.BEST) -> Dict[str, Any]:
-        """Extract video information and download URLs"""
+    async def get_video_info(
+        self,
+        url: str,
+        quality: VideoQuality = VideoQuality.BEST,
+        record_upstream: bool = True,
+        max_attempts: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Extract video information and download URLs
+        
+        Background callers pass record_upstream=False so their outcomes never
+        feed the circuit breakers; they also require every breaker closed.
+        """
+        max_attempts = max_attempts or settings.EXTRACT_MAX_ATTEMPTS
         
         # Validate URL
         if not URLValidator.is_valid_facebook_url(url):
@@ -45,25 +123,111 @@ class VideoDownloadService:
         
         # Normalize URL
         normalized_url = URLValidator.normalize_url(url)
+        cache_key = normalized_url
+        
+        # Known deterministic failures (private, removed, bad URL) skip Facebook entirely
+        cached_error = self.negative_cache.get(cache_key)
+        if cached_error:
+            kind, message = cached_error
+            raise ExtractionError(message, kind)
+        
+        result_key = f"{quality}:{cache_key}"
+        cached_result = self.extraction_cache.get(result_key)
+        if cached_result is not None:
+            return cached_result
         
         # Special handling for fb.watch URLs - try to resolve redirects
         if 'fb.watch' in normalized_url:
             normalized_url = await self._resolve_fb_watch_url(normalized_url)
         
+        # Checked once per request so a half-open probe covers its own retries
+        self._check_circuits(claim_probe=record_upstream)
+        
+        attempt = 0
+        while True:
+            try:
+                result = await self._run_extraction(normalized_url, quality)
+            except ExtractionError as e:
+                logger.error(f"Error extracting video info ({e.kind}): {str(e)}")
+                
+                attempt += 1
+                if e.kind in UPSTREAM_ERRORS and attempt < max_attempts:
+                    delay = backoff_delay(attempt, settings.EXTRACT_BACKOFF_BASE, settings.EXTRACT_BACKOFF_MAX)
+                    logger.info(f"Retrying extraction in {delay:.2f}s (attempt {attempt + 1})")
+                    await asyncio.sleep(delay)
+                    continue
+                
+                message = f"Failed to extract video information: {str(e)}"
+                if e.kind in self.breakers:
+                    # One failure per request, however many attempts it took
+                    if record_upstream:
+                        self.breakers[e.kind].record_failure()
+                elif e.kind in URL_ERRORS:
+                    # Facebook answered - upstream itself is healthy
+                    if record_upstream:
+                        self._record_upstream_success()
+                    self.negative_cache.put(cache_key, (e.kind, message))
+                raise ExtractionError(message, e.kind)
+            
+            if record_upstream:
+                self._record_upstream_success()
+            self.extraction_cache.put(result_key, result)
+            return result
+    
+    def _check_circuits(self, claim_probe: bool = True):
+        """Fail fast while any upstream breaker is open"""
+        if claim_probe:
+            # Check every breaker before claiming any half-open probe
+            blocked = [breaker for breaker in self.breakers.values() if not breaker.would_allow()]
+        else:
+            # Callers that won't report back must not use up the probe
+            blocked = [breaker for breaker in self.breakers.values() if breaker.state != CircuitBreaker.CLOSED]
+        if blocked:
+            raise UpstreamUnavailableError(
+                "Facebook is currently unavailable or throttling requests. Please try again shortly.",
+                retry_after=max(breaker.retry_after() for breaker in blocked)
+            )
+        
+        if not claim_probe:
+            return
+        for breaker in self.breakers.values():
+            breaker.allow_request()
+    
+    async def _run_extraction(self, url: str, quality: VideoQuality) -> Dict[str, Any]:
+        """Run one extraction inside the adaptive concurrency limit"""
+        await self.limiter.acquire()
+        started = time.monotonic()
+        overloaded = False
         try:
             # Run yt-dlp in a thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, 
-                self._extract_info, 
-                normalized_url, 
-                quality
-            )
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error extracting video info: {str(e)}")
-            raise ValueError(f"Failed to extract video information: {str(e)}")
+            with drain_controller.track("extractions"):
+                loop = asyncio.get_event_loop()
+                result = await loop.run_in_executor(
+                    None, 
+                    self._extract_info, 
+                    url, 
+                    quality
+                )
+        except ExtractionError as e:
+            overloaded = e.kind in UPSTREAM_ERRORS
+            raise
+        finally:
+            self.limiter.release(time.monotonic() - started, overloaded)
+        
+        return result
+    
+    def _record_upstream_success(self):
+        for breaker in self.breakers.values():
+            breaker.record_success()
+    
+    def upstream_status(self) -> Dict[str, Any]:
+        """Snapshot of limiter, breaker and negative cache state"""
+        return {
+            "concurrency": self.limiter.stats(),
+            "circuits": {kind: breaker.stats() for kind, breaker in self.breakers.items()},
+            "negative_cache_entries": len(self.negative_cache),
+            "extraction_cache_entries": len(self.extraction_cache)
+        }
     
     async def _resolve_fb_watch_url(self, url: str) -> str:
         """Resolve fb.watch URLs to full Facebook URLs with multiple redirect handling"""
@@ -157,26 +321,35 @@ class VideoDownloadService:
                 
         except yt_dlp.DownloadError as e:
             error_msg = str(e)
-            if "redirect loop" in error_msg.lower() or "redirect" in error_msg.lower():
+            if THROTTLING_PATTERN.search(error_msg):
+                raise ExtractionError(f"Facebook is throttling or failing requests: {error_msg}", ERROR_THROTTLED)
+            elif "redirect loop" in error_msg.lower() or "redirect" in error_msg.lower():
                 if 'fb.watch' in url:
-                    raise ValueError("fb.watch URL couldn't be processed. Please try: 1) Open the video on Facebook, 2) Copy the full facebook.com URL from the address bar, 3) Use that URL instead.")
+                    raise ExtractionError("fb.watch URL couldn't be processed. Please try: 1) Open the video on Facebook, 2) Copy the full facebook.com URL from the address bar, 3) Use that URL instead.", ERROR_REDIRECT)
                 else:
-                    raise ValueError("Video URL has redirect issues. Try copying the direct Facebook video URL.")
+                    raise ExtractionError("Video URL has redirect issues. Try copying the direct Facebook video URL.", ERROR_REDIRECT)
+            elif "requested format" in error_msg.lower():
+                # Depends on the requested quality, not just the URL
+                raise ExtractionError("The requested quality is not available for this video. Try another quality.", ERROR_FORMAT_UNAVAILABLE)
+            elif "unsupported url" in error_msg.lower():
+                raise ExtractionError("This URL is not supported. Please use a Facebook video URL.", ERROR_UNSUPPORTED)
             elif "private" in error_msg.lower() or "not available" in error_msg.lower():
-                raise ValueError("This video is private or not available for download.")
-            elif "age" in error_msg.lower():
-                raise ValueError("This video has age restrictions and cannot be downloaded.")
+                raise ExtractionError("This video is private or not available for download.", ERROR_PRIVATE)
+            elif AGE_RESTRICTED_PATTERN.search(error_msg):
+                raise ExtractionError("This video has age restrictions and cannot be downloaded.", ERROR_AGE_RESTRICTED)
             else:
-                raise ValueError(f"Could not extract video: {error_msg}")
+                raise ExtractionError(f"Could not extract video: {error_msg}", ERROR_OTHER)
         except Exception as e:
             error_msg = str(e)
-            if "302" in error_msg or "redirect" in error_msg.lower():
+            if THROTTLING_PATTERN.search(error_msg):
+                raise ExtractionError(f"Facebook is throttling or failing requests: {error_msg}", ERROR_THROTTLED)
+            elif "302" in error_msg or "redirect" in error_msg.lower():
                 if 'fb.watch' in url:
-                    raise ValueError("fb.watch URL needs the full Facebook URL. Please: 1) Open the video on Facebook, 2) Copy the complete facebook.com URL, 3) Try again.")
+                    raise ExtractionError("fb.watch URL needs the full Facebook URL. Please: 1) Open the video on Facebook, 2) Copy the complete facebook.com URL, 3) Try again.", ERROR_REDIRECT)
                 else:
-                    raise ValueError("URL redirect issue. Please try using the direct Facebook video URL.")
+                    raise ExtractionError("URL redirect issue. Please try using the direct Facebook video URL.", ERROR_REDIRECT)
             else:
-                raise ValueError(f"Unexpected error: {error_msg}")
+                raise ExtractionError(f"Unexpected error: {error_msg}", ERROR_OTHER)
     
     def _process_video_info(self, info: Dict[str, Any]) -> Dict[str, Any]:
         """Process and structure video information"""
@@ -0,0 +1,26 @@
+import hmac
+from fastapi import HTTPException, Request
+from app.config import settings
+
+async def check_admin_token(request: Request):
+    """Dependency to guard admin endpoints with the X-Admin-Token header"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "status": "error",
+                "message": "Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.",
+                "error_code": "ADMIN_DISABLED"
+            }
+        )
+    
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "status": "error",
+                "message": "Invalid admin token",
+                "error_code": "FORBIDDEN"
+            }
+        )
\ No newline at end of file
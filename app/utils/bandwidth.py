@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Dict
+from app.config import settings
+
+class TokenBucket:
+    """Async token bucket measured in bytes per second
+
+    Consumers may overdraw the bucket; the debt is paid back by sleeping, so
+    concurrent streams sharing a bucket are throttled in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def reserve(self, amount: int) -> float:
+        """Take tokens now and return how long the caller must wait"""
+        self._refill()
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+class BandwidthLimiter:
+    """Per-client and global byte-rate budgets for proxied streams"""
+
+    def __init__(self, client_rate: int, global_rate: int, max_clients: int = 10000):
+        # A rate of 0 disables that budget
+        self.client_rate = client_rate
+        self.global_rate = global_rate
+        self.max_clients = max_clients
+        self.global_bucket = TokenBucket(global_rate, global_rate) if global_rate > 0 else None
+        self.clients: Dict[str, TokenBucket] = {}
+
+    def _client_bucket(self, client_id: str) -> TokenBucket:
+        bucket = self.clients.get(client_id)
+        if bucket is None:
+            if len(self.clients) >= self.max_clients:
+                # Forget buckets that have fully refilled - they carry no state
+                for key in [k for k, b in self.clients.items() if b.is_full()]:
+                    del self.clients[key]
+            bucket = TokenBucket(self.client_rate, self.client_rate)
+            self.clients[client_id] = bucket
+        return bucket
+
+    async def consume(self, client_id: str, amount: int) -> float:
+        """Wait until both budgets allow sending `amount` bytes; returns seconds waited"""
+        delay = 0.0
+        if self.client_rate > 0:
+            delay = self._client_bucket(client_id).reserve(amount)
+        if self.global_bucket is not None:
+            delay = max(delay, self.global_bucket.reserve(amount))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+# Global bandwidth limiter instance
+bandwidth_limiter = BandwidthLimiter(
+    client_rate=settings.STREAM_CLIENT_BANDWIDTH_KBPS * 1024,
+    global_rate=settings.STREAM_GLOBAL_BANDWIDTH_KBPS * 1024
+)
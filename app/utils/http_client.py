@@ -0,0 +1,56 @@
+import asyncio
+import aiohttp
+import logging
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPClient:
+    """Shared aiohttp session for outbound requests to Facebook and its CDN"""
+
+    DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    }
+
+    def __init__(self, limit: int = 100):
+        self.limit = limit
+        self.reserved = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use in the running loop"""
+        loop = asyncio.get_running_loop()
+
+        # Serverless runtimes may hand us a fresh loop per invocation
+        if self._session is None or self._session.closed or self._loop is not loop:
+            self._session = aiohttp.ClientSession(
+                headers=self.DEFAULT_HEADERS,
+                connector=aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=300)
+            )
+            self._loop = loop
+
+        return self._session
+
+    def try_reserve(self) -> bool:
+        """Claim a pooled connection up front so callers can fail fast when the pool is full"""
+        if self.limit and self.reserved >= self.limit:
+            return False
+        self.reserved += 1
+        return True
+
+    def unreserve(self):
+        self.reserved = max(0, self.reserved - 1)
+
+    async def close(self):
+        """Close the pooled session (called on shutdown)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+# Global HTTP client instances - long-lived /stream transfers get their own
+# pool so they can't starve thumbnail fetches of connections
+http_client = HTTPClient()
+stream_http_client = HTTPClient(limit=settings.STREAM_MAX_CONNECTIONS)
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import signal
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Set
+from fastapi import HTTPException
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StreamHandle:
+    """In-flight stream that the drain can cut once its deadline passes"""
+
+    def __init__(self, close: Callable[[], None]):
+        self.close = close
+        self.task = asyncio.current_task()
+        self.aborted = False
+        self.cut = False
+
+class DrainController:
+    """Tracks in-flight work and coordinates graceful shutdown"""
+
+    # Time given to aborted streams to exit on their own before their tasks are cancelled
+    ABORT_GRACE = 1.0
+
+    def __init__(self):
+        self.draining = False
+        self.drain_started_at = 0.0
+        self.in_flight: Dict[str, int] = {"extractions": 0}
+        self.streams: Set[StreamHandle] = set()
+        self.last_report = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._sigterm_received = False
+
+    @contextmanager
+    def track(self, kind: str):
+        """Count a unit of work for the duration of the block"""
+        self.in_flight[kind] += 1
+        try:
+            yield
+        finally:
+            self.in_flight[kind] -= 1
+
+    @contextmanager
+    def track_stream(self, close: Callable[[], None]):
+        """Register a stream; `close` is called to cut it at the drain deadline"""
+        handle = StreamHandle(close)
+        self.streams.add(handle)
+        try:
+            yield handle
+        finally:
+            self.streams.discard(handle)
+
+    def begin_drain(self):
+        """Flip readiness to draining and start rejecting new work"""
+        if not self.draining:
+            self.draining = True
+            self.drain_started_at = time.monotonic()
+            logger.info(f"Draining: {len(self.streams)} streams, {self.in_flight['extractions']} extractions in flight")
+
+    async def drain(self, timeout: float) -> Dict[str, Any]:
+        """Wait up to `timeout` seconds for in-flight work, then cut what is left
+
+        Safe to call more than once; every caller waits on the same drain.
+        """
+        if self._drain_task is None:
+            self._drain_task = asyncio.ensure_future(self._drain(timeout))
+        return await asyncio.shield(self._drain_task)
+
+    async def _drain(self, timeout: float) -> Dict[str, Any]:
+        self.begin_drain()
+        deadline = self.drain_started_at + timeout
+
+        while (self.streams or self.in_flight["extractions"]) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+
+        report = {
+            "drain_seconds": round(time.monotonic() - self.drain_started_at, 2),
+            "aborted_streams": await self._abort_streams(),
+            # Executor threads can't be interrupted; these die with the process
+            "unfinished_extractions": self.in_flight["extractions"]
+        }
+        self.last_report = report
+        logger.info(
+            f"Drain finished in {report['drain_seconds']}s "
+            f"(aborted streams: {report['aborted_streams']}, unfinished extractions: {report['unfinished_extractions']})"
+        )
+        return report
+
+    async def _abort_streams(self) -> int:
+        """Cut every stream still running and return how many were actually cut"""
+        remaining = list(self.streams)
+        if not remaining:
+            return 0
+
+        # Closing upstream wakes streams blocked on reads; they exit quietly
+        for handle in remaining:
+            handle.aborted = True
+            handle.close()
+
+        grace_deadline = time.monotonic() + self.ABORT_GRACE
+        while self.streams and time.monotonic() < grace_deadline:
+            await asyncio.sleep(0.05)
+
+        # Anything left is stuck sending to a slow client
+        for handle in list(self.streams):
+            handle.cut = True
+            if handle.task is not None:
+                handle.task.cancel()
+
+        return sum(1 for handle in remaining if handle.cut)
+
+    def install_server_hook(self):
+        """Drain on SIGTERM before letting uvicorn shut down
+
+        uvicorn stops accepting connections and waits on open ones before
+        running lifespan shutdown, so draining has to start at the signal.
+        Server.handle_exit is wrapped here, at app import, which is before
+        uvicorn registers it as the signal handler (under any event loop).
+        Other servers get the lifespan drain only.
+        """
+        try:
+            from uvicorn.server import Server
+        except ImportError:
+            logger.warning("uvicorn not available - draining on lifespan shutdown only")
+            return
+
+        handle_exit = Server.handle_exit
+        if getattr(handle_exit, "drains_first", False):
+            return
+
+        controller = self
+
+        def drain_then_exit(server, sig, frame):
+            if sig != signal.SIGTERM or controller._sigterm_received:
+                # Other signals, or a second SIGTERM - stop holding the server back
+                return handle_exit(server, sig, frame)
+            controller._sigterm_received = True
+
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return handle_exit(server, sig, frame)
+            # Thread-safe call also wakes the loop when signal.signal() was used
+            loop.call_soon_threadsafe(controller._start_sigterm_drain, lambda: handle_exit(server, sig, frame))
+
+        drain_then_exit.drains_first = True
+        Server.handle_exit = drain_then_exit
+
+    def _start_sigterm_drain(self, exit_server: Callable[[], None]):
+        task = asyncio.ensure_future(self.drain(settings.SHUTDOWN_DRAIN_TIMEOUT))
+        task.add_done_callback(lambda _: exit_server())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "draining": self.draining,
+            "in_flight": {
+                "extractions": self.in_flight["extractions"],
+                "streams": len(self.streams)
+            }
+        }
+
+# Global drain controller instance
+drain_controller = DrainController()
+
+async def check_not_draining():
+    """Dependency to reject new work while the instance is draining"""
+    if drain_controller.draining:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "status": "error",
+                "message": "Server is restarting. Please retry shortly.",
+                "error_code": "SERVICE_DRAINING"
+            },
+            headers={"Retry-After": "5"}
+        )
@@ -7,13 +7,15 @@ from app.config import settings
 class RateLimiter:
     """Simple in-memory rate limiter"""
     
-    def __init__(self):
+    def __init__(self, max_requests: int = None, window: int = None):
+        self.max_requests = max_requests or settings.RATE_LIMIT_REQUESTS
+        self.window = window or settings.RATE_LIMIT_WINDOW
         self.clients: Dict[str, Deque[float]] = defaultdict(deque)
     
     def is_allowed(self, client_id: str) -> bool:
         """Check if client is allowed to make request"""
         now = time.time()
-        window_start = now - settings.RATE_LIMIT_WINDOW
+        window_start = now - self.window
         
         # Clean old requests
         client_requests = self.clients[client_id]
@@ -21,7 +23,7 @@ class RateLimiter:
             client_requests.popleft()
         
         # Check rate limit
-        if len(client_requests) >= settings.RATE_LIMIT_REQUESTS:
+        if len(client_requests) >= self.max_requests:
             return False
         
         # Add current request
@@ -39,8 +41,10 @@ class RateLimiter:
         client_host = getattr(request.client, "host", "unknown")
         return client_host
 
-# Global rate limiter instance
+# Global rate limiter instances
 rate_limiter = RateLimiter()
+# Thumbnails load on every results view, so they get their own, larger budget
+thumbnail_rate_limiter = RateLimiter(settings.THUMBNAIL_RATE_LIMIT_REQUESTS)
 
 async def check_rate_limit(request: Request):
     """Dependency to check rate limits"""
@@ -54,4 +58,18 @@ async def check_rate_limit(request: Request):
                 "message": f"Rate limit exceeded. Maximum {settings.RATE_LIMIT_REQUESTS} requests per {settings.RATE_LIMIT_WINDOW} seconds.",
                 "error_code": "RATE_LIMIT_EXCEEDED"
             }
+        )
+
+async def check_thumbnail_rate_limit(request: Request):
+    """Dependency to check the thumbnail proxy rate limit"""
+    client_id = thumbnail_rate_limiter.get_client_id(request)
+    
+    if not thumbnail_rate_limiter.is_allowed(client_id):
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "status": "error",
+                "message": f"Rate limit exceeded. Maximum {thumbnail_rate_limiter.max_requests} thumbnail requests per {thumbnail_rate_limiter.window} seconds.",
+                "error_code": "RATE_LIMIT_EXCEEDED"
+            }
         )
\ No newline at end of file
@@ -0,0 +1,196 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limiter for concurrent upstream calls
+
+    The limit grows by roughly one slot per window of fast successes and is
+    halved when a call is slow or the upstream signals overload - at most
+    once per batch, so a burst of slow calls ending together counts once.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        decrease_ratio: float = 0.5
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.target_latency = target_latency
+        self.decrease_ratio = decrease_ratio
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        """Wait until a concurrency slot is free and take it"""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled - pass it on
+                self.in_flight -= 1
+                self._wake_waiters()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float, overloaded: bool = False):
+        """Return a slot and adjust the limit from the observed outcome"""
+        now = time.monotonic()
+        if overloaded or latency > self.target_latency:
+            # Calls started before the last decrease were sized by the old
+            # limit; the decrease already accounts for them
+            if now - latency >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.decrease_ratio)
+                self._last_decrease = now
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def has_spare_capacity(self, reserved: int = 1) -> bool:
+        """True when nobody is queued and `reserved` slots would still be free
+
+        An idle limiter always has room: the limit only grows as calls
+        complete, so at a limit of 1 nothing else would ever get a turn.
+        """
+        if self._waiters:
+            return False
+        return self.in_flight == 0 or self.in_flight + reserved < int(self.limit)
+
+    def _wake_waiters(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters)
+        }
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_deadline = 0.0
+
+    def would_allow(self) -> bool:
+        """Check, without side effects, whether allow_request() would succeed"""
+        if self.state == self.CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at < self.reset_timeout:
+            return False
+        # Only one probe at a time; a lost probe is re-granted after the timeout
+        return now >= self._probe_deadline
+
+    def allow_request(self) -> bool:
+        """Check if a call may go upstream, granting a probe when half-open"""
+        if not self.would_allow():
+            return False
+
+        if self.state != self.CLOSED:
+            self.state = self.HALF_OPEN
+            self._probe_deadline = time.monotonic() + self.reset_timeout
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_deadline = 0.0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_deadline = 0.0
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will let a probe through"""
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            return max(0.0, self.reset_timeout - (now - self.opened_at))
+        if self.state == self.HALF_OPEN:
+            return max(0.0, self._probe_deadline - now)
+        return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures
+        }
+
+
+class TTLCache:
+    """Bounded TTL cache keyed by URL (used for extraction results and failures)"""
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: Dict[str, Tuple[float, Any]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, if still fresh"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        return value
+
+    def put(self, key: str, value: Any):
+        if self.ttl <= 0:
+            return
+
+        now = time.monotonic()
+        if key not in self.entries and len(self.entries) >= self.max_entries:
+            # Drop expired entries first, then the oldest if still full
+            self.entries = {k: v for k, v in self.entries.items() if v[0] > now}
+            if len(self.entries) >= self.max_entries:
+                self.entries.pop(next(iter(self.entries)))
+
+        self.entries[key] = (now + self.ttl, value)
+
+    def __len__(self) -> int:
+        return len(self.entries)
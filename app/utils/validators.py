@@ -24,6 +24,9 @@ class URLValidator:
         r'https?://(?:www\.|web\.|m\.)?facebook\.com/.*/.*',
     ]
     
+    # CDN hosts Facebook serves media (thumbnails, video files) from
+    FACEBOOK_MEDIA_HOSTS = ('fbcdn.net', 'fbsbx.com')
+    
     @classmethod
     def is_valid_facebook_url(cls, url: str) -> bool:
         """Check if URL is a valid Facebook video URL"""
@@ -59,4 +62,18 @@ class URLValidator:
             url = url.replace('web.facebook.com', 'www.facebook.com')
             url = url.replace('m.facebook.com', 'www.facebook.com')
             
-        return url
\ No newline at end of file
+        return url
+    
+    @classmethod
+    def is_facebook_media_url(cls, url: str) -> bool:
+        """Check if URL points at a Facebook CDN host"""
+        try:
+            parsed = urlparse(url)
+        except Exception:
+            return False
+        
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return False
+        
+        host = parsed.hostname.lower()
+        return any(host == domain or host.endswith('.' + domain) for domain in cls.FACEBOOK_MEDIA_HOSTS)
\ No newline at end of file
@@ -79,8 +79,19 @@ class FacebookVideoDownloader {
         const videoInfo = document.getElementById('videoInfo');
         const downloadLink = document.getElementById('downloadLink');
         
+        // URL-safe id from the title, shared by /thumbnail and /stream
+        const videoId = this.generateVideoId(data.video_info.title);
+        
+        // Thumbnail is proxied through our resize cache instead of loading from Facebook
+        const thumbnailHtml = data.video_info.thumbnail
+            ? `<img src="/thumbnail/${videoId}?size=medium&url=${encodeURIComponent(data.video_info.thumbnail)}"
+                    alt="Video thumbnail" loading="lazy" class="w-full max-w-xs rounded-lg mb-4"
+                    onerror="this.remove()">`
+            : '';
+        
         // Populate video information
         videoInfo.innerHTML = `
+            ${thumbnailHtml}
             <div class="grid md:grid-cols-2 gap-4">
                 <div>
                     <p class="text-sm font-medium text-gray-700">Title:</p>
@@ -102,7 +113,6 @@ class FacebookVideoDownloader {
         `;
         
         // Set download link with streaming endpoint
-        const videoId = this.generateVideoId(data.video_info.title);
         const streamUrl = `/stream/${videoId}?url=${encodeURIComponent(data.download_url)}`;
         const fileName = this.generateFileName(data.video_info.title);
         